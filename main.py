@@ -41,8 +41,20 @@ def main():
         help='Path to configuration file (default: config.yaml)'
     )
     
+    parser.add_argument(
+        '--convert-voices',
+        action='store_true',
+        help='Convert voice packs to .safetensors in the voices folder and exit'
+    )
+    
     args = parser.parse_args()
 
+    if args.convert_voices:
+        import models
+        converted = models.convert_voices_to_safetensors()
+        logger.info(f"Voice conversion finished: {len(converted)} file(s) written.")
+        sys.exit(0)
+
     # Start the GUI
     try:
         logger.info("Starting Kokoro TTS GUI...")
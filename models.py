@@ -1,14 +1,28 @@
 import os
+import importlib.util
 from pathlib import Path
 import logging
+import threading
+
+# --- HuggingFace Download Tuning ---
+# Must be set before huggingface_hub is imported (it reads the env once).
+# hf_transfer is the Rust downloader; only enable it when it is installed,
+# otherwise huggingface_hub refuses to download at all.
+if importlib.util.find_spec("hf_transfer") is not None:
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
 import torch
-from typing import List, Optional, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Dict, Tuple, Iterable
 
 # Use the logger configured in main.py
 logger = logging.getLogger(__name__)
 
 # --- Configuration ---
 VOICES_DIR = Path("voices") # Directory for CUSTOM local .pt voice files
+KOKORO_REPO_ID = "hexgrad/Kokoro-82M" # Weights + voices live in the HF cache (HF_HOME / HF_HUB_CACHE)
+MAX_DOWNLOAD_WORKERS = 16 # Voice files are small; downloads are latency-bound
+SAFETENSORS_VOICE_KEY = "pack" # Tensor name used inside converted .safetensors voices
 
 # --- Voice Name Mapping ---
 # ONLY Valid voices from hexgrad/Kokoro-82M
@@ -48,6 +62,13 @@ _cached_available_voices: Optional[List[str]] = None
 _cached_internal_to_friendly: Optional[Dict[str, str]] = None
 _cached_friendly_to_internal: Optional[Dict[str, str]] = None
 
+# --- Cached Voice Packs (keyed by internal name + device) ---
+_voice_cache: Dict[Tuple[str, str], torch.Tensor] = {}
+
+# --- Cached Pipelines (keyed by lang code + device) ---
+_pipelines: Dict[Tuple[str, str], object] = {}
+_pipeline_lock = threading.Lock()
+
 
 def _build_voice_maps() -> Tuple[Dict[str, str], Dict[str, str]]:
     """
@@ -64,11 +85,15 @@ def _build_voice_maps() -> Tuple[Dict[str, str], Dict[str, str]]:
 
     # 2. Scan local directory for EXTRA custom voices
     if VOICES_DIR.is_dir():
-        found_files = list(VOICES_DIR.glob("*.pt"))
-        if found_files:
-            logger.info(f"Scanning '{VOICES_DIR}' for custom voices... Found {len(found_files)}.")
-            for file_path in found_files:
-                internal_stem = file_path.stem 
+        # scandir gets the file type from the directory listing itself (no per-file stat)
+        with os.scandir(VOICES_DIR) as entries:
+            found_stems = [
+                entry.name[:-3] for entry in entries
+                if entry.name.endswith(".pt") and entry.is_file()
+            ]
+        if found_stems:
+            logger.info(f"Scanning '{VOICES_DIR}' for custom voices... Found {len(found_stems)}.")
+            for internal_stem in found_stems:
                 if internal_stem not in internal_to_friendly_map:
                     friendly_name = f"📁 Custom ({internal_stem})"
                     internal_to_friendly_map[internal_stem] = friendly_name
@@ -100,6 +125,14 @@ def list_available_voices() -> List[str]:
     return _cached_available_voices
 
 
+def invalidate_voice_list() -> None:
+    """Forgets the cached voice list/maps so the next lookup rescans the voices directory."""
+    global _cached_available_voices, _cached_internal_to_friendly, _cached_friendly_to_internal
+    _cached_available_voices = None
+    _cached_internal_to_friendly = None
+    _cached_friendly_to_internal = None
+
+
 def get_internal_voice_name(user_friendly_name: str) -> Optional[str]:
     """Converts a user-friendly voice name back to its internal filename stem."""
     _, f_to_int = _build_voice_maps()
@@ -112,24 +145,266 @@ def get_friendly_voice_name(internal_name: str) -> Optional[str]:
     return int_to_f.get(internal_name)
 
 
-def build_pipeline(lang_code: str = 'a', device: Optional[str] = None):
-    """Builds and returns a KPipeline instance."""
+def _fresh_safetensors(voice_path: Path, warn: bool = True) -> Optional[Path]:
+    """
+    Returns the .safetensors twin of a voice file if it exists and is at least as
+    new as the .pt next to it (the same staleness rule as convert_voices_to_safetensors).
+    """
+    safetensors_path = voice_path.with_suffix(".safetensors")
     try:
-        from kokoro import KPipeline
-    except ImportError as e:
-        logger.critical("Failed to import KPipeline. Is 'kokoro' installed?", exc_info=True)
-        raise ImportError("Kokoro TTS library not found.") from e
+        converted_mtime = safetensors_path.stat().st_mtime
+    except OSError:
+        return None
+    try:
+        if voice_path.with_suffix(".pt").stat().st_mtime > converted_mtime:
+            if warn:
+                logger.warning(f"{safetensors_path} is older than its .pt; using the .pt "
+                               f"(re-run with --convert-voices to update it).")
+            return None
+    except OSError:
+        pass # No .pt next to it
+    return safetensors_path
+
+
+def download_voice_files(voice_names: Iterable[str]) -> Dict[str, str]:
+    """
+    Resolves internal voice names to local voice file paths.
+    Files in VOICES_DIR win (an up-to-date converted .safetensors first, then .pt); standard
+    voices are fetched from the HF hub in parallel (cache hits return immediately).
+    """
+    from huggingface_hub import hf_hub_download
+
+    resolved: Dict[str, str] = {}
+    missing: List[str] = []
+
+    for name in dict.fromkeys(voice_names):
+        pt_path = VOICES_DIR / f"{name}.pt"
+        converted = _fresh_safetensors(pt_path)
+        if converted is not None:
+            resolved[name] = str(converted)
+        elif pt_path.is_file():
+            resolved[name] = str(pt_path)
+        else:
+            missing.append(name)
+
+    if not missing:
+        return resolved
+
+    logger.info(f"Fetching {len(missing)} voice file(s) from {KOKORO_REPO_ID}...")
+    with ThreadPoolExecutor(max_workers=min(MAX_DOWNLOAD_WORKERS, len(missing))) as executor:
+        futures = {
+            executor.submit(hf_hub_download, repo_id=KOKORO_REPO_ID, filename=f"voices/{name}.pt"): name
+            for name in missing
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                resolved[name] = future.result()
+            except Exception as e:
+                logger.error(f"Failed to download voice {name}: {e}")
+
+    return resolved
+
+
+def load_voice_pack(voice_path: str, device: str) -> torch.Tensor:
+    """
+    Loads a voice pack straight onto `device`.
+    A .safetensors file (or an up-to-date twin next to the .pt) is preferred; .pt files
+    are memory-mapped when possible. Both .pt paths use weights_only=True, like kokoro.
+    """
+    safetensors_path = _fresh_safetensors(Path(voice_path), warn=False)
+    if safetensors_path is not None:
+        try:
+            from safetensors.torch import load_file
+            return load_file(str(safetensors_path), device=device)[SAFETENSORS_VOICE_KEY]
+        except Exception as e:
+            if Path(voice_path) == safetensors_path:
+                raise
+            logger.warning(f"Could not load {safetensors_path} ({e}); falling back to {voice_path}.")
+
+    try:
+        return torch.load(voice_path, map_location=device, mmap=True, weights_only=True)
+    except Exception as e:
+        logger.warning(f"Memory-mapped load failed for {voice_path} ({e}); retrying without mmap.")
+
+    # Arbitrary pickles are rejected here; callers log the error
+    return torch.load(voice_path, map_location=device, weights_only=True)
+
+
+def convert_voices_to_safetensors(include_standard: bool = True) -> List[str]:
+    """
+    One-time conversion of voice packs to .safetensors files in VOICES_DIR.
+    Converts custom .pt voices and, optionally, the standard hub voices.
+    Up-to-date files are skipped. Returns the names that were written.
+    """
+    try:
+        from safetensors.torch import save_file
+    except ImportError:
+        logger.error("Voice conversion requires safetensors. Please run: pip install safetensors")
+        return []
+
+    os.makedirs(VOICES_DIR, exist_ok=True)
+    names = [p.stem for p in VOICES_DIR.glob("*.pt")]
+    if include_standard:
+        names.extend(VOICE_NAME_MAP)
+
+    voice_paths: Dict[str, str] = {}
+    for name in dict.fromkeys(names):
+        pt_path = VOICES_DIR / f"{name}.pt"
+        if pt_path.is_file():
+            voice_paths[name] = str(pt_path)
+    voice_paths.update(download_voice_files(n for n in names if n not in voice_paths))
+
+    converted = []
+    for name, voice_path in voice_paths.items():
+        target = VOICES_DIR / f"{name}.safetensors"
+        if voice_path == str(target):
+            continue
+        if target.is_file() and target.stat().st_mtime >= os.path.getmtime(voice_path):
+            continue
+        try:
+            pack = torch.load(voice_path, map_location="cpu", weights_only=True)
+            save_file({SAFETENSORS_VOICE_KEY: pack.contiguous()}, str(target))
+            converted.append(name)
+        except Exception as e:
+            logger.error(f"Failed to convert voice {name}: {e}")
+
+    logger.info(f"Converted {len(converted)} voice(s) to safetensors in '{VOICES_DIR}'.")
+    return converted
+
 
+def load_voices(pipeline, voice_names: Iterable[str], device: str) -> List[str]:
+    """
+    Makes the given voices available in `pipeline.voices` as device-resident packs.
+    Packs are cached per (voice, device), so repeat syntheses skip disk and H2D copies.
+    Returns the names that were loaded successfully.
+    """
+    names = list(dict.fromkeys(voice_names))
+    missing = [name for name in names if (name, device) not in _voice_cache]
+
+    if missing:
+        voice_paths = download_voice_files(missing)
+        for name in missing:
+            voice_path = voice_paths.get(name)
+            if not voice_path:
+                continue
+            try:
+                _voice_cache[(name, device)] = load_voice_pack(voice_path, device)
+            except Exception as e:
+                logger.error(f"Failed to load voice {name}: {e}")
+
+    loaded = []
+    for name in names:
+        pack = _voice_cache.get((name, device))
+        if pack is not None:
+            pipeline.voices[name] = pack
+            loaded.append(name)
+    return loaded
+
+
+def clear_voice_cache() -> None:
+    """
+    Drops all cached voice packs (e.g. after voice files changed on disk), including
+    the ones each shared pipeline keeps itself, such as kokoro's averaged blends
+    ("a,b"). load_voices() reseeds single voices on the next synthesis.
+    """
+    _voice_cache.clear()
+    with _pipeline_lock:
+        pipelines = list(_pipelines.values())
+    for pipeline in pipelines:
+        pipeline.voices.clear()
+
+
+class CompiledModelError(RuntimeError):
+    """Raised when the forward pass installed by compile_model() fails."""
+
+
+def compile_model(model) -> None:
+    """
+    Wraps the model's forward pass in torch.compile (kernel fusion).
+    The default mode is used on purpose: 'reduce-overhead' keeps its CUDA graphs in
+    thread-local state (unusable from the synthesis thread after a warm-up elsewhere)
+    and records a new graph for every chunk length.
+    Compilation is lazy: the first call pays for it and surfaces any errors,
+    raised as CompiledModelError so callers can tell them apart from G2P/voice errors.
+    """
+    compiled_forward = torch.compile(model.forward_with_tokens, dynamic=True)
+
+    def forward_with_tokens(*args, **kwargs):
+        try:
+            return compiled_forward(*args, **kwargs)
+        except Exception as e:
+            raise CompiledModelError(f"Compiled forward pass failed: {e}") from e
+
+    model.forward_with_tokens = forward_with_tokens
+    logger.info("Kokoro model wrapped with torch.compile.")
+
+
+def uncompile_model(model) -> None:
+    """Reverts compile_model(), restoring the eager forward pass."""
+    model.__dict__.pop('forward_with_tokens', None)
+
+
+def build_pipeline(
+    lang_code: str = 'a',
+    device: Optional[str] = None,
+    prefetch_voices: Iterable[str] = (),
+    use_compile: bool = False
+):
+    """
+    Returns the shared KPipeline for (lang_code, device), building it on first use.
+    Concurrent callers wait for the one build instead of loading the model twice.
+    `prefetch_voices` and `use_compile` only apply to that first build.
+    """
     resolved_device = device
     if not resolved_device:
         resolved_device = 'cuda' if torch.cuda.is_available() else 'cpu'
-    
-    logger.info(f"Building KPipeline (lang='{lang_code}', device='{resolved_device}')...")
+
+    key = (lang_code, resolved_device)
+    pipeline = _pipelines.get(key)
+    if pipeline is not None:
+        return pipeline
+
+    with _pipeline_lock:
+        pipeline = _pipelines.get(key)
+        if pipeline is None:
+            pipeline = _create_pipeline(lang_code, resolved_device, prefetch_voices, use_compile)
+            _pipelines[key] = pipeline
+    return pipeline
+
+
+def _create_pipeline(lang_code: str, device: str, prefetch_voices: Iterable[str], use_compile: bool):
+    """
+    Builds a new KPipeline instance.
+    The model weights are downloaded and loaded on a worker thread while the
+    G2P frontend initialises here; `prefetch_voices` are fetched alongside.
+    `use_compile` applies torch.compile to the model (CUDA only).
+    """
+    try:
+        from kokoro import KModel, KPipeline
+    except ImportError as e:
+        logger.critical("Failed to import KPipeline. Is 'kokoro' installed?", exc_info=True)
+        raise ImportError("Kokoro TTS library not found.") from e
+
+    logger.info(f"Building KPipeline (lang='{lang_code}', device='{device}')...")
 
     try:
-        pipeline = KPipeline(lang_code=lang_code, device=resolved_device)
+        if device == 'cuda' and not torch.cuda.is_available():
+            raise RuntimeError("CUDA requested, but not available.")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            model_future = executor.submit(lambda: KModel(repo_id=KOKORO_REPO_ID).to(device).eval())
+            executor.submit(download_voice_files, list(prefetch_voices))
+
+            # model=False builds only the text frontend; the model is attached below
+            pipeline = KPipeline(lang_code=lang_code, repo_id=KOKORO_REPO_ID, model=False)
+            pipeline.model = model_future.result()
+
+        if use_compile and device == 'cuda':
+            compile_model(pipeline.model)
+
         logger.info("KPipeline built successfully.")
         return pipeline
     except Exception as e:
-        logger.exception(f"Error building KPipeline on {resolved_device}.")
-        raise RuntimeError(f"Failed to build KPipeline: {e}") from e
\ No newline at end of file
+        logger.exception(f"Error building KPipeline on {device}.")
+        raise RuntimeError(f"Failed to build KPipeline: {e}") from e
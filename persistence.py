@@ -3,27 +3,79 @@ import os
 import time
 import logging
 
+try:
+    import orjson  # Optional: much faster (de)serialization of history lines
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 # --- JSON GENERATIONS (HISTORY) ---
+# Stored as JSON Lines: one generation per line, so new entries are appended
+# instead of rewriting the whole history.
+
+def _dump_line(entry) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(entry) + b"\n"
+    return (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+
+def _load_line(line: bytes):
+    return orjson.loads(line) if orjson is not None else json.loads(line)
 
 def load_generations(file_path):
-    """Load generation history."""
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading generations: {e}")
-            return []
-    return []
+    """Load generation history (migrates a legacy .json history if needed)."""
+    if not os.path.exists(file_path):
+        legacy_path = os.path.splitext(file_path)[0] + ".json"
+        if legacy_path != file_path and os.path.exists(legacy_path):
+            return _migrate_legacy_generations(legacy_path, file_path)
+        return []
+
+    generations = []
+    try:
+        with open(file_path, "rb") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    generations.append(_load_line(line))
+                except ValueError as e:
+                    logger.warning(f"Skipping corrupt history line: {e}")
+    except Exception as e:
+        logger.error(f"Error loading generations: {e}")
+        return []
+    return generations
+
+def _migrate_legacy_generations(legacy_path, file_path):
+    """Converts the old single-document generations.json to JSON Lines."""
+    try:
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            generations = json.load(f)
+    except Exception as e:
+        logger.error(f"Error loading generations: {e}")
+        return []
+    if not isinstance(generations, list):
+        return []
+
+    save_generations(file_path, generations)
+    logger.info(f"Migrated {len(generations)} history entries from {legacy_path} to {file_path}.")
+    return generations
 
 def save_generations(file_path, generations):
-    """Save generation history."""
+    """Save (rewrite) the full generation history."""
     try:
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(generations, f, indent=2, ensure_ascii=False)
+        with open(file_path, "wb") as f:
+            f.write(b"".join(_dump_line(entry) for entry in generations))
+    except Exception as e:
+        logger.error(f"Error saving generations: {e}")
+
+def append_generation(file_path, entry):
+    """Append a single generation to the history file."""
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "ab") as f:
+            f.write(_dump_line(entry))
     except Exception as e:
         logger.error(f"Error saving generations: {e}")
 
@@ -54,25 +106,32 @@ def load_project_file(file_path):
 # --- FILE MANAGEMENT & CLEANUP  ---
 
 def cleanup_temp_files(temp_dir, retention_days=7):
-    """Remove old chunk files to save space."""
+    """
+    Remove old chunk files to save space. Returns the number of files removed.
+    `retention_days <= 0` removes every chunk file regardless of its mtime.
+    """
     now = time.time()
     retention_seconds = retention_days * 86400
+    remove_all = retention_days <= 0
     if not os.path.exists(temp_dir): 
-        return
+        return 0
     
     deleted_count = 0
-    for filename in os.listdir(temp_dir):
-        filepath = os.path.join(temp_dir, filename)
-        if os.path.isfile(filepath) and filename.startswith("chunk_"):
-            if now - os.path.getmtime(filepath) > retention_seconds:
-                try:
-                    os.remove(filepath)
+    # scandir yields name + type from the directory listing; the mtime stat is only needed with a retention
+    with os.scandir(temp_dir) as entries:
+        for entry in entries:
+            if not entry.name.startswith("chunk_") or not entry.is_file(follow_symlinks=False):
+                continue
+            try:
+                if remove_all or now - entry.stat(follow_symlinks=False).st_mtime > retention_seconds:
+                    os.remove(entry.path)
                     deleted_count += 1
-                except Exception as e:
-                    logger.error(f"Error removing temp file {filepath}: {e}")
+            except OSError as e:
+                logger.error(f"Error removing temp file {entry.path}: {e}")
     
     if deleted_count > 0:
         logger.info(f"Cleanup: Removed {deleted_count} old temporary files.")
+    return deleted_count
 
 def delete_file(filepath: str) -> bool:
     """Deletes a single file safely."""
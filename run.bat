@@ -34,17 +34,26 @@ if not exist "%VENV_DIR%" (
     uv venv %VENV_DIR% --python python3.11
 )
 
-:: Ensure pip exists inside venv
-echo Ensuring pip is available in venv...
-%VENV_DIR%\Scripts\python.exe -m ensurepip --upgrade
-
 :: Activate venv
 echo Activating environment...
 call %VENV_DIR%\Scripts\activate
 
-:: Install non-Torch dependencies
-echo Installing dependencies...
-uv pip install -r requirements.txt
+:: Install non-Torch dependencies only when requirements.txt changed since the last install.
+:: A copy of the installed requirements.txt is kept in the venv as a stamp.
+:: Force a reinstall with:  run.bat reinstall
+set REQ_STAMP=%VENV_DIR%\requirements.installed.txt
+set NEED_DEPS=1
+if exist "%REQ_STAMP%" if /i not "%~1"=="reinstall" (
+    fc /b requirements.txt "%REQ_STAMP%" >nul 2>nul && set NEED_DEPS=0
+)
+if "!NEED_DEPS!"=="1" (
+    echo Ensuring pip is available in venv...
+    %VENV_DIR%\Scripts\python.exe -m ensurepip --upgrade
+    echo Installing dependencies...
+    uv pip install -r requirements.txt && copy /y requirements.txt "%REQ_STAMP%" >nul
+) else (
+    echo Dependencies up to date - skipping install.
+)
 
 :: Install correct PyTorch build.
 :: On CPU-only systems, skip reinstall if torch is already present.
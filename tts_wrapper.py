@@ -1,15 +1,23 @@
 import os
+import re
 import time
+import contextlib
+import queue
+import threading
 import torch
 import numpy as np
 import soundfile as sf
 import logging
 import librosa # Essential for pitch shifting!
 
-from typing import Optional, List, Tuple, Callable
+from typing import Optional, List, Tuple, Callable, Iterator
 from pydub import AudioSegment
+# models must be imported before kokoro so its HF download settings apply
+from models import (
+    build_pipeline, list_available_voices, get_internal_voice_name,
+    load_voices, uncompile_model, CompiledModelError
+)
 from kokoro import KPipeline 
-from models import build_pipeline, list_available_voices, get_internal_voice_name
 
 # Use the logger configured in main.py
 logger = logging.getLogger(__name__)
@@ -19,6 +27,9 @@ OUTPUTS_DIR = "outputs"
 TEMP_DIR = "temp_audio"
 CHUNK_PREFIX = "chunk_"
 DEFAULT_SAMPLERATE = 24000 
+DEFAULT_VOICE = "af_heart"
+# KPipeline splits text with re.split(); a compiled pattern skips the per-call lookup
+SPLIT_PATTERN = re.compile(r'\n+')
 
 class KokoroTTSWrapper:
     """Wraps Kokoro KPipeline, handles voice loading, blending with weights, saving."""
@@ -36,22 +47,64 @@ class KokoroTTSWrapper:
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
         # self.device = 'cpu'
         logger.info(f"TTS Wrapper using device: {self.device}")
-        self.pipeline: Optional[KPipeline] = None
+        # Opt-in fp16 autocast on CUDA (tts_engine.half_precision in config.yaml)
+        self.half_precision = bool(self.config.get('tts_engine', {}).get('half_precision', False))
+        # Opt-in torch.compile on CUDA (tts_engine.compile in config.yaml)
+        self.use_compile = bool(self.config.get('tts_engine', {}).get('compile', False))
 
         os.makedirs(self.output_dir, exist_ok=True)
         os.makedirs(self.temp_dir, exist_ok=True)
 
+        # Background writer: save_audio() only enqueues, flush() waits for the disk
+        self._write_queue: "queue.Queue[Tuple[np.ndarray, str, str, int]]" = queue.Queue()
+        self._writer_thread = threading.Thread(target=self._writer_loop, name="audio_writer", daemon=True)
+        self._writer_thread.start()
+
+        # Last used voice, prefetched while the pipeline is being built
+        self.default_voice = get_internal_voice_name(self.config.get('tts_engine', {}).get('voice', ''))
+
+        # The pipeline is built lazily (see `pipeline`); start it in the background
+        # so the window can show while the model loads
+        self._pipeline: Optional[KPipeline] = None
+        self._pipeline_lock = threading.Lock()
+        threading.Thread(target=self._preload_pipeline, name="pipeline_preload", daemon=True).start()
+
+        logger.info("KokoroTTSWrapper.__init__ END")
+
+    @property
+    def pipeline(self) -> KPipeline:
+        """The Kokoro pipeline, built on first access (thread-safe)."""
+        if self._pipeline is None:
+            with self._pipeline_lock:
+                if self._pipeline is None:
+                    self._pipeline = self._build_pipeline()
+        return self._pipeline
+
+    def _preload_pipeline(self):
         try:
-            # Build the pipeline on initialization
-            self.pipeline = build_pipeline(device=self.device)
+            self.pipeline
+        except Exception:
+            # Already logged; synthesize() retries and reports the error to the UI
+            pass
+
+    def _build_pipeline(self) -> KPipeline:
+        """Builds the pipeline on the preferred device, falling back to CPU if CUDA fails."""
+        prefetch_voices = [self.default_voice] if self.default_voice else []
+
+        try:
+            pipeline = build_pipeline(device=self.device, prefetch_voices=prefetch_voices, use_compile=self.use_compile)
             logger.info(f"Kokoro Pipeline built successfully on device {self.device}.")
+            if self.use_compile and self.device == 'cuda':
+                self._warm_up(pipeline, self.default_voice or DEFAULT_VOICE)
+            return pipeline
         except Exception as e:
             if self.device == 'cuda':
                 logger.exception("Failed to initialize Kokoro pipeline on CUDA. Falling back to CPU.")
                 self.device = 'cpu'
                 try:
-                    self.pipeline = build_pipeline(device=self.device)
+                    pipeline = build_pipeline(device=self.device, prefetch_voices=prefetch_voices)
                     logger.info("Kokoro Pipeline rebuilt successfully on CPU.")
+                    return pipeline
                 except Exception as cpu_error:
                     logger.exception("Failed to initialize Kokoro pipeline on CPU after CUDA fallback.")
                     raise RuntimeError(f"Failed to initialize TTS engine: {cpu_error}") from cpu_error
@@ -59,8 +112,6 @@ class KokoroTTSWrapper:
                 logger.exception("Failed to initialize Kokoro pipeline.")
                 raise RuntimeError(f"Failed to initialize TTS engine: {e}") from e
 
-        logger.info("KokoroTTSWrapper.__init__ END")
-
     def synthesize(
         self,
         segments: List[Tuple[str, List[str], Optional[str]]],
@@ -74,15 +125,52 @@ class KokoroTTSWrapper:
         output_format: str = 'WAV',
         progress_callback: Optional[Callable[[int, int], None]] = None
     ) -> Tuple[List[Tuple[str, str, np.ndarray, str]], Optional[str]]:
-        
+        """Synthesizes all segments, then saves the combined file. Returns (chunks, combined_path)."""
+        try:
+            synthesis_result_list = list(self.synthesize_stream(
+                segments,
+                speed=speed,
+                pitch=pitch,
+                alpha=alpha,
+                beta=beta,
+                diffusion_steps=diffusion_steps,
+                embedding_scale=embedding_scale,
+                sample_rate=sample_rate,
+                progress_callback=progress_callback
+            ))
+            combined_filepath = self.save_combined(
+                [audio for _, _, audio, _ in synthesis_result_list],
+                sample_rate=sample_rate,
+                output_format=output_format
+            )
+        finally:
+            # Files must exist before the caller gets their paths
+            self.flush()
+
+        logger.info("Synthesis complete.")
+        return synthesis_result_list, combined_filepath
+
+    def synthesize_stream(
+        self,
+        segments: List[Tuple[str, List[str], Optional[str]]],
+        speed: float = 1.0,
+        pitch: float = 1.0,
+        alpha: float = 0.0, 
+        beta: float = 0.0,  
+        diffusion_steps: int = 0,
+        embedding_scale: float = 1.0,
+        sample_rate: int = DEFAULT_SAMPLERATE,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Iterator[Tuple[str, str, np.ndarray, str]]:
+        """
+        Yields (graphemes, phonemes, audio, chunk_filepath) as each chunk is generated.
+        Chunk files are written in the background; call flush() before opening one.
+        """
         if not self.pipeline:
             raise RuntimeError("TTS Pipeline is not initialized.")
 
         logger.info(f"Starting synthesis. Speed: {speed}, Pitch: {pitch}, Rate: {sample_rate}")
 
-        all_audio_tensors: List[torch.Tensor] = []
-        synthesis_result_list: List[Tuple[str, str, np.ndarray, str]] = []
-        combined_filepath: Optional[str] = None
         total_segments = len(segments)
 
         try:
@@ -111,12 +199,11 @@ class KokoroTTSWrapper:
                     voice_map[v_str] = ",".join(resolved_parts)
 
             logger.info(f"Pre-loading {len(unique_internal_voices_needed)} voices: {unique_internal_voices_needed}")
-            for internal_name in unique_internal_voices_needed:
-                try:
-                    self.pipeline.load_voice(internal_name)
-                except Exception as load_error:
-                    logger.error(f"Failed to load voice {internal_name}: {str(load_error)}")
-                    pass 
+            # Voice packs are fetched concurrently and cached on the device, so the
+            # pipeline's per-segment `.to(device)` becomes a no-op
+            loaded_voices = load_voices(self.pipeline, unique_internal_voices_needed, self.device)
+            for internal_name in unique_internal_voices_needed.difference(loaded_voices):
+                logger.error(f"Failed to load voice {internal_name}")
 
             # --- 2. Process Segments ---
             for i, (text_chunk, segment_voices, weight_str) in enumerate(segments):
@@ -138,50 +225,65 @@ class KokoroTTSWrapper:
                     generate_kwargs = {
                         "voice": blended_voice_spec,
                         "speed": speed,
+                        "split_pattern": SPLIT_PATTERN,
                     }
                     
                     # Advanced params logging
                     if diffusion_steps > 0 or alpha > 0 or beta > 0:
                         logger.debug("Advanced style params ignored (not supported by current Kokoro build).")
 
-                    for result in self.pipeline(text_chunk, **generate_kwargs):
-                        if hasattr(result, 'audio') and result.audio is not None:
-                            try:
-                                audio_tensor = result.audio.cpu().float().squeeze()
-                                if audio_tensor.ndim != 1: 
-                                    audio_tensor = audio_tensor.flatten()
+                    # Audio results already yielded; an eager retry after a compiled failure skips them
+                    handled = 0
+                    while True:
+                        seen = 0
+                        try:
+                            with self._inference_context():
+                                for result in self.pipeline(text_chunk, **generate_kwargs):
+                                    if hasattr(result, 'audio') and result.audio is not None:
+                                        seen += 1
+                                        if seen <= handled:
+                                            continue # Already yielded before an eager retry
+                                        handled = seen
+                                        try:
+                                            audio_tensor = result.audio.cpu().float().squeeze()
+                                            if audio_tensor.ndim != 1: 
+                                                audio_tensor = audio_tensor.flatten()
                                 
-                                audio_data_numpy = audio_tensor.numpy()
-
-                                # --- Pitch Shift ---
-                                if pitch != 1.0:
-                                    try:
-                                        n_steps = 12 * np.log2(pitch)
-                                        audio_data_numpy = librosa.effects.pitch_shift(
-                                            audio_data_numpy, 
-                                            sr=DEFAULT_SAMPLERATE, 
-                                            n_steps=n_steps
-                                        )
-                                        audio_tensor = torch.from_numpy(audio_data_numpy)
-                                    except Exception as e_pitch:
-                                        logger.error(f"Pitch shift failed: {e_pitch}")
-
-                                chunk_timestamp = time.strftime("%Y%m%d_%H%M%S")
-                                unique_suffix = f"{segment_num}_{chunk_results_count}_{int(time.time()*1000)}"
-                                chunk_filepath = os.path.join(self.temp_dir, f"{CHUNK_PREFIX}{chunk_timestamp}_{unique_suffix}.wav")
+                                            audio_data_numpy = audio_tensor.numpy()
+
+                                            # --- Pitch Shift ---
+                                            if pitch != 1.0:
+                                                try:
+                                                    n_steps = 12 * np.log2(pitch)
+                                                    audio_data_numpy = librosa.effects.pitch_shift(
+                                                        audio_data_numpy, 
+                                                        sr=DEFAULT_SAMPLERATE, 
+                                                        n_steps=n_steps
+                                                    )
+                                                except Exception as e_pitch:
+                                                    logger.error(f"Pitch shift failed: {e_pitch}")
+
+                                            chunk_timestamp = time.strftime("%Y%m%d_%H%M%S")
+                                            unique_suffix = f"{segment_num}_{chunk_results_count}_{int(time.time()*1000)}"
+                                            chunk_filepath = os.path.join(self.temp_dir, f"{CHUNK_PREFIX}{chunk_timestamp}_{unique_suffix}.wav")
                                 
-                                # Save Chunk (WAV, Resampled)
-                                self.save_audio(audio_data_numpy, chunk_filepath, format='WAV', target_sample_rate=sample_rate)
-
-                                graphemes = getattr(result, 'graphemes', None) or ""
-                                phonemes = getattr(result, 'phonemes', None) or ""
-                                synthesis_result_list.append((graphemes, phonemes, audio_data_numpy, chunk_filepath))
-                                all_audio_tensors.append(audio_tensor)
-                                chunk_results_count += 1
+                                            # Save Chunk (WAV, Resampled) on the writer thread
+                                            self.save_audio(audio_data_numpy, chunk_filepath, format='WAV', target_sample_rate=sample_rate)
+
+                                            graphemes = getattr(result, 'graphemes', None) or ""
+                                            phonemes = getattr(result, 'phonemes', None) or ""
+                                            chunk_results_count += 1
                                 
-                            except Exception as proc_err:
-                                logger.exception(f"Error processing chunk for seg {segment_num}: {proc_err}")
-                                continue
+                                        except Exception as proc_err:
+                                            logger.exception(f"Error processing chunk for seg {segment_num}: {proc_err}")
+                                            continue
+
+                                        yield graphemes, phonemes, audio_data_numpy, chunk_filepath
+                            break
+                        except CompiledModelError:
+                            # Only the compiled forward pass; G2P/voice errors propagate unchanged
+                            logger.exception(f"Compiled model failed on seg {segment_num}; falling back to eager mode.")
+                            uncompile_model(self.pipeline.model)
 
                 except Exception as synth_call_err:
                     logger.exception(f"Pipeline error seg {segment_num}: {synth_call_err}")
@@ -190,30 +292,68 @@ class KokoroTTSWrapper:
                 if progress_callback:
                     progress_callback(segment_num, total_segments)
 
-            # --- 3. Final Combination ---
-            if all_audio_tensors:
-                logger.info(f"Combining {len(all_audio_tensors)} audio chunks...")
-                combined_audio_tensor = torch.cat(all_audio_tensors, dim=0)
-                combined_audio_numpy = combined_audio_tensor.cpu().float().numpy()
-                
-                combined_timestamp = time.strftime("%Y%m%d_%H%M%S")
-                combined_filename = f"combined_{combined_timestamp}.{output_format.lower()}"
-                combined_filepath = os.path.join(self.output_dir, combined_filename)
-                
-                # Save Final (User Format, Resampled)
-                self.save_audio(combined_audio_numpy, combined_filepath, format=output_format, target_sample_rate=sample_rate)
-                logger.info(f"Combined audio saved: {combined_filepath}")
-            else:
-                combined_filepath = None
-
         except Exception as e:
             logger.exception(f"Synthesis failed: {e}")
             raise
 
-        logger.info("Synthesis complete.")
-        return synthesis_result_list, combined_filepath
+    def save_combined(
+        self,
+        audio_chunks: List[np.ndarray],
+        sample_rate: int = DEFAULT_SAMPLERATE,
+        output_format: str = 'WAV'
+    ) -> Optional[str]:
+        """Queues the concatenated chunks as the final output file. Returns its path."""
+        if not audio_chunks:
+            return None
+
+        logger.info(f"Combining {len(audio_chunks)} audio chunks...")
+        combined_audio_numpy = np.concatenate(audio_chunks)
+        
+        combined_timestamp = time.strftime("%Y%m%d_%H%M%S")
+        combined_filename = f"combined_{combined_timestamp}.{output_format.lower()}"
+        combined_filepath = os.path.join(self.output_dir, combined_filename)
+        
+        # Save Final (User Format, Resampled)
+        self.save_audio(combined_audio_numpy, combined_filepath, format=output_format, target_sample_rate=sample_rate)
+        logger.info(f"Combined audio queued: {combined_filepath}")
+        return combined_filepath
+
+    def _warm_up(self, pipeline: KPipeline, voice: str):
+        """Runs one short synthesis so torch.compile cost is paid at startup, not on first use."""
+        logger.info("Warming up compiled model...")
+        try:
+            load_voices(pipeline, [voice], self.device)
+            with self._inference_context():
+                for _ in pipeline("Warm up.", voice=voice):
+                    pass
+        except Exception as e:
+            logger.warning(f"Compiled warm-up failed ({e}); falling back to eager mode.")
+            uncompile_model(pipeline.model)
+
+    def _inference_context(self):
+        """fp16 autocast for generation when enabled and running on CUDA."""
+        if self.half_precision and self.device == 'cuda':
+            return torch.autocast(device_type='cuda', dtype=torch.float16)
+        return contextlib.nullcontext()
 
     def save_audio(self, audio_data_numpy: np.ndarray, filepath: str, format: str ='WAV', target_sample_rate: int = DEFAULT_SAMPLERATE):
+        """Queues audio to be saved by the background writer. Call flush() before using the file."""
+        self._write_queue.put((audio_data_numpy, filepath, format, target_sample_rate))
+
+    def flush(self):
+        """Blocks until every queued save_audio() call has been written."""
+        self._write_queue.join()
+
+    def _writer_loop(self):
+        """Runs on the writer thread for the lifetime of the wrapper."""
+        while True:
+            audio_data_numpy, filepath, format, target_sample_rate = self._write_queue.get()
+            try:
+                self._write_audio(audio_data_numpy, filepath, format, target_sample_rate)
+            finally:
+                self._write_queue.task_done()
+
+    def _write_audio(self, audio_data_numpy: np.ndarray, filepath: str, format: str ='WAV', target_sample_rate: int = DEFAULT_SAMPLERATE):
         """Saves audio, resampling if needed, and enforcing PCM_16 for WAV compatibility."""
         
         current_rate = DEFAULT_SAMPLERATE # Kokoro native is 24000
@@ -227,24 +367,21 @@ class KokoroTTSWrapper:
                 # Use librosa to change sample rate (e.g. 24k -> 16k)
                 audio_data_numpy = librosa.resample(audio_data_numpy, orig_sr=current_rate, target_sr=target_sample_rate)
             
-            # --- 2. Format Conversion (Float32 -> Float32) ---
-            if not np.issubdtype(audio_data_numpy.dtype, np.floating):
-                 audio_float = audio_data_numpy.astype(np.float32)
-            else:
-                 audio_float = audio_data_numpy.astype(np.float32)
+            # --- 2. Format Conversion (-> Float32, no copy if already float32) ---
+            audio_float = np.asarray(audio_data_numpy, dtype=np.float32)
 
             # Mono check
             if audio_float.ndim > 1: 
-                audio_float_mono = np.mean(audio_float, axis=1)
-            else: 
-                audio_float_mono = audio_float
+                audio_float = np.mean(audio_float, axis=1, dtype=np.float32)
 
-            # Clip
-            audio_clipped = np.clip(audio_float_mono, -1.0, 1.0)
+            # Clip into a fresh buffer (the caller's array is left untouched),
+            # then scale straight into the int16 output - one temporary in total
+            audio_clipped = np.clip(audio_float, -1.0, 1.0)
+            audio_data_int16 = np.empty(audio_clipped.shape, dtype=np.int16)
+            np.multiply(audio_clipped, 32767.0, out=audio_data_int16, casting='unsafe')
 
             # --- 3. Save ---
             if target_format_upper == 'MP3':
-                 audio_data_int16 = (audio_clipped * 32767).astype(np.int16)
                  audio_segment = AudioSegment(
                      data=audio_data_int16.tobytes(), 
                      sample_width=2, 
@@ -255,7 +392,9 @@ class KokoroTTSWrapper:
 
             elif target_format_upper == 'WAV':
                  # CRITICAL FIX: Use subtype='PCM_16' for UI compatibility
-                 sf.write(filepath, audio_clipped, samplerate=target_sample_rate, format='WAV', subtype='PCM_16')
+                 # Samples are already int16, so hand the raw buffer straight to libsndfile
+                 with sf.SoundFile(filepath, 'w', samplerate=target_sample_rate, channels=1, subtype='PCM_16', format='WAV') as snd:
+                     snd.buffer_write(audio_data_int16, dtype='int16')
 
             else: 
                 raise ValueError(f"Unsupported audio format: {format}")
@@ -1,26 +1,33 @@
 import os
 import sys
 import time
+import copy
 import yaml
 import shutil
 import logging
 import numpy as np
-from functools import partial
+from functools import lru_cache
 import wave
-from typing import Optional
+from typing import Optional, Tuple
 from pydub import AudioSegment
 
 from PySide6.QtCore import (
-    Qt, QUrl, QThread, QObject, Signal, Slot, QTimer)
+    Qt, QUrl, QThread, QObject, Signal, Slot, QTimer, QPointF, QRunnable, QThreadPool,
+    QEvent, QRect, QSize)
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
     QLabel, QPushButton, QTextEdit, QTableWidget, QTableWidgetItem,
     QHeaderView, QFileDialog, QDoubleSpinBox, QSpinBox, QComboBox,
     QSlider,QScrollArea, QTreeWidget, QTreeWidgetItem, QAbstractItemView, 
-    QSizePolicy, QFrame, QApplication,QTabWidget, QGroupBox, QMessageBox
+    QSizePolicy, QFrame, QApplication,QTabWidget, QGroupBox, QMessageBox,
+    QStyledItemDelegate, QToolTip
 )
-from PySide6.QtGui import QPainter, QPen, QColor, QLinearGradient
+from PySide6.QtGui import QPainter, QPen, QColor, QLinearGradient, QPolygonF
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
+try:
+    from PySide6.QtMultimedia import QPlaybackOptions # Qt 6.10+
+except ImportError:
+    QPlaybackOptions = None
 
 # Import local modules
 import models
@@ -31,39 +38,214 @@ import error_handler
 # --- Constants ---
 OUTPUTS_DIR = "outputs"
 TEMP_DIR = "temp_audio"
-PERSIST_FILENAME = "generations.json"
+PERSIST_FILENAME = "generations.jsonl"
 PERSIST_FILE = os.path.join(OUTPUTS_DIR, PERSIST_FILENAME)
 CHUNK_PREFIX = "chunk_"
+POSITION_UPDATE_MS = 100 # Throttles playback position redraws to ~10 Hz
+HISTORY_SAVE_DELAY_MS = 1500 # Coalesces back-to-back history rewrites into one
+PEAKS_SUFFIX = ".peaks.npy"
+PEAK_BUCKETS = 2048
 
 logger = logging.getLogger(__name__)
 
+try:
+    from yaml import CSafeLoader as _YamlLoader # LibYAML C bindings
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# ------------------- Config -------------------
+@lru_cache(maxsize=4)
+def _parse_config(path: str, mtime: float) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=_YamlLoader) or {}
+
+def load_config(path: str) -> dict:
+    """Loads a yaml config, memoized per (path, mtime). Returns a copy the caller may modify."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    return copy.deepcopy(_parse_config(path, mtime))
+
+# ------------------- Waveform Peaks -------------------
+def _wav_frames_to_mono(frames: bytes, sample_width: int, channels: int) -> np.ndarray:
+    """Converts raw PCM frames to mono int16 samples."""
+    dtype = np.int16 if sample_width == 2 else np.uint8
+    audio_data = np.frombuffer(frames, dtype=dtype)
+    if dtype == np.uint8: 
+        audio_data = audio_data.astype(np.int16) - 128
+    if channels > 1:
+        # Integer downmix: sum in int32, then shift/divide back to int16
+        mixed = audio_data.reshape(-1, channels).sum(axis=1, dtype=np.int32)
+        audio_data = (mixed >> 1 if channels == 2 else mixed // channels).astype(np.int16)
+    return audio_data
+
+def _wav_minmax_streamed(filepath: str, buckets: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    MinMax-reduces a WAV file to `buckets` pairs while reading it one second at a
+    time, so memory stays O(buckets) regardless of the clip length.
+    """
+    with wave.open(filepath, "rb") as wav_file:
+        sample_width, channels = wav_file.getsampwidth(), wav_file.getnchannels()
+        total = wav_file.getnframes()
+        buckets = min(buckets, total)
+        if buckets == 0:
+            return None
+        # Same bucket boundaries as _minmax_buckets() over the whole file
+        starts = np.linspace(0, total, buckets, endpoint=False).astype(np.intp)
+        peaks_min = np.full(buckets, np.iinfo(np.int16).max, dtype=np.int16)
+        peaks_max = np.full(buckets, np.iinfo(np.int16).min, dtype=np.int16)
+
+        offset = 0
+        while frames := wav_file.readframes(wav_file.getframerate()):
+            chunk = _wav_frames_to_mono(frames, sample_width, channels)
+            end = offset + len(chunk)
+            # Buckets touched by this chunk: the one holding `offset` plus all starting inside it
+            first = np.searchsorted(starts, offset, side="right") - 1
+            last = np.searchsorted(starts, end, side="left")
+            local_starts = np.maximum(starts[first:last] - offset, 0)
+            np.minimum(peaks_min[first:last], np.minimum.reduceat(chunk, local_starts), out=peaks_min[first:last])
+            np.maximum(peaks_max[first:last], np.maximum.reduceat(chunk, local_starts), out=peaks_max[first:last])
+            offset = end
+
+    # A truncated file may hold fewer frames than its header claims
+    filled = np.searchsorted(starts, offset, side="left")
+    if filled == 0:
+        return None
+    return peaks_min[:filled], peaks_max[:filled]
+
+def _audio_minmax(filepath: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """MinMax-reduces an audio file to PEAK_BUCKETS pairs (supports mp3 via pydub fallback)."""
+    # Native WAV (Fast, streamed)
+    if filepath.lower().endswith(".wav"):
+        return _wav_minmax_streamed(filepath, PEAK_BUCKETS)
+
+    # Fallback/MP3 via Pydub (decodes the whole file)
+    audio = AudioSegment.from_file(filepath)
+    if audio.channels > 1: 
+        audio = audio.set_channels(1)
+    samples = np.array(audio.get_array_of_samples())
+    if len(samples) == 0:
+        return None
+    return _minmax_buckets(samples, PEAK_BUCKETS)
+
+def _minmax_buckets(data: np.ndarray, buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Reduces data to at most `buckets` (min, max) pairs over near-equal slices."""
+    buckets = min(buckets, len(data))
+    starts = np.linspace(0, len(data), buckets, endpoint=False).astype(np.intp)
+    return np.minimum.reduceat(data, starts), np.maximum.reduceat(data, starts)
+
+def _load_or_build_peaks(filepath: str) -> Optional[np.ndarray]:
+    """
+    Returns the normalized waveform peaks of an audio file as a float32 array of
+    shape (2, buckets) holding (min, max). The peaks are cached next to the file
+    in `<file>.peaks.npy` and rebuilt when the audio is newer than the cache.
+    """
+    if not filepath:
+        return None
+    peaks_path = filepath + PEAKS_SUFFIX
+    try:
+        if os.path.getmtime(peaks_path) >= os.path.getmtime(filepath):
+            return np.load(peaks_path)
+    except (OSError, ValueError):
+        pass
+
+    try:
+        minmax = _audio_minmax(filepath)
+        if minmax is None:
+            return None
+        peaks = np.stack(minmax).astype(np.float32)
+
+        # Normalize: the buckets hold the global extremes, so the peak comes from them
+        peak = np.max(np.abs(peaks))
+        if peak > 0:
+            peaks /= peak
+    except Exception as e:
+        logger.warning(f"Waveform loader failed for {filepath}: {e}")
+        return None
+
+    try:
+        np.save(peaks_path, peaks)
+    except OSError as e:
+        logger.warning(f"Could not cache waveform peaks for {filepath}: {e}")
+    return peaks
+
+class _PeakSignals(QObject):
+    peaksReady = Signal(str, object)
+
+class _PeakLoader(QRunnable):
+    """Decodes a file's waveform peaks on the global thread pool."""
+    def __init__(self, filepath: str, signals: _PeakSignals):
+        super().__init__()
+        self.filepath = filepath
+        self.signals = signals
+
+    def run(self):
+        self.signals.peaksReady.emit(self.filepath, _load_or_build_peaks(self.filepath))
+
 # ------------------- Waveform Widget -------------------
 class WaveformWidget(QWidget):
     seek_position_signal = Signal(int)
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.waveform_data = None
+        self.audio_filepath = None
+        self.peaks_min = None
+        self.peaks_max = None
+        self._peak_signals = _PeakSignals(self)
+        self._peak_signals.peaksReady.connect(self._on_peaks_ready, Qt.ConnectionType.QueuedConnection)
+        self._polygon_cache = None # ((width, height), QPolygonF)
         self.playback_progress = 0.0
         self.audio_player_duration_ms = 0
         self.setMinimumHeight(60)
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
         self.setMouseTracking(True)
 
-    def set_waveform(self, data: Optional[np.ndarray]):
-        if data is not None and len(data) > 0:
-            max_abs = np.max(np.abs(data))
-            normalized_data = data / max_abs if max_abs > 0 else data
-            target_points = self.width() * 2
-            if len(normalized_data) > target_points:
-                step = max(1, len(normalized_data) // target_points)
-                self.waveform_data = normalized_data[::step]
-            else:
-                self.waveform_data = normalized_data
+    @Slot(str)
+    def set_file(self, filepath: str):
+        """Loads the peaks of `filepath` in the background and shows them when ready."""
+        self.set_peaks(None, filepath)
+        QThreadPool.globalInstance().start(_PeakLoader(filepath, self._peak_signals))
+
+    @Slot(str, object)
+    def _on_peaks_ready(self, filepath: str, peaks: Optional[np.ndarray]):
+        # Ignore results for a file that is no longer shown
+        if filepath == self.audio_filepath:
+            self.set_peaks(peaks, filepath)
+
+    def set_peaks(self, peaks: Optional[np.ndarray], filepath: Optional[str] = None):
+        """Sets the (2, buckets) min/max peaks from `_load_or_build_peaks`."""
+        self.audio_filepath = filepath
+        if peaks is not None and peaks.shape[-1] > 0:
+            self.peaks_min, self.peaks_max = peaks[0], peaks[1]
         else:
-            self.waveform_data = None
+            self.peaks_min = self.peaks_max = None
+        self._polygon_cache = None
         self.update()
 
+    def _waveform_polygon(self, width: int, height: int) -> QPolygonF:
+        """
+        Reduces the peaks to one (max, min) pair per pixel column and returns
+        them as a zig-zag polyline. Cached until the peaks or size change.
+        """
+        if self._polygon_cache is not None and self._polygon_cache[0] == (width, height):
+            return self._polygon_cache[1]
+
+        col_min = _minmax_buckets(self.peaks_min, width)[0]
+        col_max = _minmax_buckets(self.peaks_max, width)[1]
+        columns = len(col_max)
+
+        center_y = height / 2
+        scale_factor = center_y * 0.90
+        xs = np.repeat(np.arange(columns) * (width / columns), 2)
+        ys = np.empty(columns * 2)
+        ys[0::2] = center_y - col_max * scale_factor
+        ys[1::2] = center_y - col_min * scale_factor
+
+        polygon = QPolygonF([QPointF(x, y) for x, y in zip(xs.tolist(), ys.tolist())])
+        self._polygon_cache = ((width, height), polygon)
+        return polygon
+
     def set_playback_progress(self, progress: float):
         self.playback_progress = max(0.0, min(progress, 1.0))
         self.update()
@@ -90,25 +272,13 @@ class WaveformWidget(QWidget):
         gradient.setColorAt(1, QColor("#282c34"))
         painter.fillRect(rect, gradient)
 
-        if self.waveform_data is not None and len(self.waveform_data) > 0:
+        if self.peaks_max is not None:
             pen = QPen(QColor("#61afef"))
             pen.setWidth(1)
             painter.setPen(pen)
             
-            center_y = rect.height() / 2
-            scale_factor = center_y * 0.90
-            num_points = len(self.waveform_data)
-            
             if rect.width() > 0:
-                points_per_pixel = num_points / rect.width()
-                for x in range(rect.width()):
-                    idx = int(x * points_per_pixel)
-                    if idx >= num_points: 
-                        break
-                    val = self.waveform_data[idx]
-                    y1 = int(center_y - val * scale_factor)
-                    y2 = int(center_y + val * scale_factor)
-                    painter.drawLine(x, y1, x, y2)
+                painter.drawPolyline(self._waveform_polygon(rect.width(), rect.height()))
 
         # Progress Line
         progress_x = int(rect.width() * self.playback_progress)
@@ -120,12 +290,85 @@ class WaveformWidget(QWidget):
         painter.fillRect(overlay_rect, QColor(255, 255, 255, 20))
         painter.end()
 
+# ------------------- History Actions -------------------
+class HistoryActionsDelegate(QStyledItemDelegate):
+    """
+    Paints the history action buttons and reports clicks on them, so the tree
+    needs no widgets per row. Each item stores a list of (action, payload,
+    tooltip) tuples in UserRole; a payload of None disables the button.
+    """
+    action_clicked = Signal(str, object)
+
+    BUTTON_WIDTH = 30
+    BUTTON_SPACING = 5
+    LABELS = {"play": "▶", "save": "💾", "delete": "❌", "copy": "📋"}
+    # Matches the window stylesheet's QPushButton rule and the old per-row button colours
+    BUTTON_COLOR = QColor("#3e4451")
+    TEXT_COLOR = QColor("white")
+    PLAY_COLOR = QColor("#98c379")
+    DISABLED_COLOR = QColor("#5c6370")
+
+    def _buttons(self, option, index):
+        actions = index.data(Qt.ItemDataRole.UserRole) or []
+        rect = option.rect.adjusted(2, 2, -2, -2)
+        step = self.BUTTON_WIDTH + self.BUTTON_SPACING
+        for i, action in enumerate(actions):
+            yield QRect(rect.x() + i * step, rect.y(), self.BUTTON_WIDTH, rect.height()), action
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        # Painted by hand: the stylesheet's QPushButton rule doesn't apply to delegate-drawn controls
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        font = painter.font()
+        for rect, (action, payload, _) in self._buttons(option, index):
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(self.BUTTON_COLOR)
+            painter.drawRoundedRect(rect, 4, 4)
+
+            enabled = payload is not None
+            if not enabled:
+                color = self.DISABLED_COLOR
+            elif action == "play":
+                color = self.PLAY_COLOR
+            else:
+                color = self.TEXT_COLOR
+            font.setBold(enabled and action == "play")
+            painter.setFont(font)
+            painter.setPen(color)
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, self.LABELS[action])
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        count = len(index.data(Qt.ItemDataRole.UserRole) or [])
+        return QSize(count * (self.BUTTON_WIDTH + self.BUTTON_SPACING), max(size.height(), 28))
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            pos = event.position().toPoint()
+            for rect, (action, payload, _) in self._buttons(option, index):
+                if rect.contains(pos):
+                    if payload is not None:
+                        self.action_clicked.emit(action, payload)
+                    return True
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option, index):
+        if event.type() == QEvent.Type.ToolTip:
+            for rect, (_, _, tooltip) in self._buttons(option, index):
+                if rect.contains(event.pos()):
+                    QToolTip.showText(event.globalPos(), tooltip, view)
+                    return True
+        return super().helpEvent(event, view, option, index)
+
 # ------------------- Worker Thread -------------------
 class SynthesisWorker(QObject):
     progress = Signal(int, int)
     finished = Signal(object) 
     error = Signal(str)
-    file_ready = Signal(str, np.ndarray)
+    file_ready = Signal(str, object)
+    first_chunk_ready = Signal(str)
 
     def __init__(self, tts_wrapper: Optional[KokoroTTSWrapper], parent=None):
         super().__init__(parent)
@@ -170,25 +413,39 @@ class SynthesisWorker(QObject):
                     raise InterruptedError("Synthesis stopped by user.")
                 self.progress.emit(curr, total)
 
-            # Pass to wrapper
-            results = self.tts_wrapper.synthesize(
-                segments=segments,
-                speed=speed,
-                pitch=pitch,
-                sample_rate=sample_rate,
-                output_format=output_format,
-                progress_callback=check_stop_progress
-            )
-            
-            synthesis_result_list, combined_filepath = results
+            # Stream chunks from the wrapper so playback can start on the first one
+            synthesis_result_list = []
+            try:
+                for chunk in self.tts_wrapper.synthesize_stream(
+                    segments=segments,
+                    speed=speed,
+                    pitch=pitch,
+                    sample_rate=sample_rate,
+                    progress_callback=check_stop_progress
+                ):
+                    synthesis_result_list.append(chunk)
+                    if len(synthesis_result_list) == 1:
+                        self.tts_wrapper.flush()
+                        self.first_chunk_ready.emit(chunk[3])
+
+                combined_filepath = self.tts_wrapper.save_combined(
+                    [c[2] for c in synthesis_result_list],
+                    sample_rate=sample_rate,
+                    output_format=output_format
+                )
+            finally:
+                self.tts_wrapper.flush()
+
+            results = (synthesis_result_list, combined_filepath)
             elapsed = time.time() - self.start_time
             logger.info(f"Worker finished in {elapsed:.2f}s")
 
             # Load waveform if combined file exists
-            if combined_filepath and os.path.exists(combined_filepath):
-                waveform = self._load_waveform_data(combined_filepath)
-                if waveform is not None:
-                    self.file_ready.emit(combined_filepath, waveform)
+            # (the write may have failed after save_combined() queued it; the loader then returns None)
+            if combined_filepath:
+                peaks = _load_or_build_peaks(combined_filepath)
+                if peaks is not None:
+                    self.file_ready.emit(combined_filepath, peaks)
             
             self.finished.emit(results)
 
@@ -198,56 +455,16 @@ class SynthesisWorker(QObject):
         finally:
             self._is_synthesizing = False
 
-    def _load_waveform_data(self, filepath: str) -> Optional[np.ndarray]:
-        """Helper to load waveform safely (supports mp3 via pydub fallback)."""
-        if not filepath or not os.path.exists(filepath):
-            return None
-            
-        try:
-            # Native WAV (Fast)
-            if filepath.lower().endswith(".wav"):
-                with wave.open(filepath, "rb") as wav_file:
-                    frames = wav_file.readframes(wav_file.getnframes())
-                    dtype = np.int16 if wav_file.getsampwidth() == 2 else np.uint8
-                    audio_data = np.frombuffer(frames, dtype=dtype)
-                    if dtype == np.int16: 
-                        audio_data = audio_data.astype(np.float32) / 32768.0
-                    else: 
-                        audio_data = (audio_data.astype(np.float32) - 128.0) / 128.0
-                    if wav_file.getnchannels() > 1:
-                        audio_data = audio_data.reshape(-1, wav_file.getnchannels()).mean(axis=1)
-                    
-                    # Normalize
-                    peak = np.max(np.abs(audio_data))
-                    return audio_data / peak if peak > 1e-6 else audio_data
-            
-            # Fallback/MP3 via Pydub
-            audio = AudioSegment.from_file(filepath)
-            if audio.channels > 1: 
-                audio = audio.set_channels(1)
-            raw = np.array(audio.get_array_of_samples())
-            
-            # Normalize
-            if audio.sample_width == 2: 
-                max_val = 32768.0
-            else: 
-                max_val = float(2**(8*audio.sample_width - 1))
-            
-            normalized = raw.astype(np.float32) / max_val
-            return normalized
-            
-        except Exception as e:
-            self.error.emit("Waveform loader failed for {filepath}: {e}")
-            return None
-
-class FileLoaderWorker(QObject):
-    """Worker to load/parse text files in background."""
+class _FileLoaderSignals(QObject):
     finished = Signal(list)
     error = Signal(str)
 
-    def __init__(self, path: str):
+class FileLoaderWorker(QRunnable):
+    """Worker to load/parse text files on the global thread pool."""
+    def __init__(self, path: str, signals: _FileLoaderSignals):
         super().__init__()
         self.path = path
+        self.signals = signals
 
     def run(self):
         try:
@@ -264,7 +481,7 @@ class FileLoaderWorker(QObject):
                     warnings.filterwarnings("ignore", category=UserWarning, module="ebooklib")
                     warnings.filterwarnings("ignore", category=FutureWarning, module="ebooklib")
                 except ImportError:
-                    self.error.emit("EPUB support requires libraries.\nPlease run: pip install EbookLib beautifulsoup4")
+                    self.signals.error.emit("EPUB support requires libraries.\nPlease run: pip install EbookLib beautifulsoup4")
                     return
 
                 book = epub.read_epub(self.path)
@@ -281,12 +498,27 @@ class FileLoaderWorker(QObject):
                     lines = [l.strip() for l in f.readlines() if l.strip()]
 
             if not lines:
-                self.error.emit("File appears empty or could not be parsed.")
+                self.signals.error.emit("File appears empty or could not be parsed.")
             else:
-                self.finished.emit(lines)
+                self.signals.finished.emit(lines)
 
         except Exception as e:
-            self.error.emit(f"Failed to load file: {str(e)}")
+            self.signals.error.emit(f"Failed to load file: {str(e)}")
+
+
+class _CleanupSignals(QObject):
+    finished = Signal(int)
+
+class _TempCleanupTask(QRunnable):
+    """Removes all temp chunk files on the global thread pool."""
+    def __init__(self, temp_dir: str, signals: _CleanupSignals):
+        super().__init__()
+        self.temp_dir = temp_dir
+        self.signals = signals
+
+    def run(self):
+        deleted = persistence.cleanup_temp_files(self.temp_dir, retention_days=0)
+        self.signals.finished.emit(deleted)
 
 
 # ------------------- Main Window v2.0.1 -------------------
@@ -300,6 +532,7 @@ class MyTTSMainWindow(QMainWindow):
         self.config_path = config_path
         self.config = self._load_config(config_path)
         self.synthesis_results = persistence.load_generations(PERSIST_FILE)
+        self._rendered_gen_count = 0 # Generations currently shown in the history tree
         self.tts_wrapper = None
         self.synthesis_thread = None
         self.synthesis_worker = None
@@ -307,9 +540,26 @@ class MyTTSMainWindow(QMainWindow):
         # Audio State
         self.current_filepath = None
         self.stored_duration = 0
+        self._total_time_str = "00:00"
+        self._total_time_has_hours = False
+        self._last_pos_update_ms = 0
+        self._stream_preview_path = None # First chunk playing while the rest synthesizes
+        self._pending_seek_ms = 0
         self.audio_output = None
         self.media_player = None
 
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(HISTORY_SAVE_DELAY_MS)
+        self._save_timer.timeout.connect(self._flush_history_save)
+
+        self._file_loader_signals = _FileLoaderSignals(self)
+        self._file_loader_signals.finished.connect(self.on_file_load_success)
+        self._file_loader_signals.error.connect(self.on_file_load_error)
+
+        self._cleanup_signals = _CleanupSignals(self)
+        self._cleanup_signals.finished.connect(self.on_temp_files_cleared)
+
         # Init Engine & Thread
         self._init_engine()
         self._init_media_player()
@@ -334,6 +584,7 @@ class MyTTSMainWindow(QMainWindow):
             self.synthesis_worker.finished.connect(self.on_synthesis_finished)
             self.synthesis_worker.error.connect(self.on_synthesis_error)
             self.synthesis_worker.file_ready.connect(self.on_file_ready_for_playback)
+            self.synthesis_worker.first_chunk_ready.connect(self.on_first_chunk_ready)
             self.synthesize_args_signal.connect(self.synthesis_worker.synthesize)
             
             self.synthesis_thread.start()
@@ -345,10 +596,18 @@ class MyTTSMainWindow(QMainWindow):
         self.media_player = QMediaPlayer(self)
         self.media_player.setAudioOutput(self.audio_output)
         self.audio_output.setVolume(0.7)
+
+        # Short local WAVs don't need the large FFmpeg probe buffer before playback starts
+        if QPlaybackOptions is not None and hasattr(self.media_player, "setPlaybackOptions"):
+            options = QPlaybackOptions()
+            options.setPlaybackIntent(QPlaybackOptions.PlaybackIntent.LowLatencyStreaming)
+            options.setProbeSize(16384)
+            self.media_player.setPlaybackOptions(options)
         
         self.media_player.positionChanged.connect(self.on_player_position_changed)
         self.media_player.durationChanged.connect(self.on_player_duration_changed)
         self.media_player.playbackStateChanged.connect(self.on_player_state_changed)
+        self.media_player.mediaStatusChanged.connect(self.on_player_media_status_changed)
         self.media_player.errorOccurred.connect(lambda e, s: error_handler.show_error(self,"Player Error: {s}"))
         
 
@@ -493,16 +752,7 @@ class MyTTSMainWindow(QMainWindow):
 
         # CPU or GPU
         self.lbl_device = QLabel("Checking...")
-        
-        if self.tts_wrapper and self.tts_wrapper.device == 'cuda':
-            self.lbl_device.setText("GPU (CUDA) 🚀")
-            self.lbl_device.setToolTip("You are using CUDA")
-            self.lbl_device.setStyleSheet("color: #98c379; font-weight: bold; border: none;") 
-        else:
-            self.lbl_device.setText("CPU (Slow) 🐢")
-            self.lbl_device.setToolTip("You are using CPU")
-            self.lbl_device.setStyleSheet("color: #e5c07b; font-weight: bold; border: none;")
-            
+        self._update_device_label()
         gs_layout.addRow("Device:", self.lbl_device)
         
         self.seed_spin = QSpinBox()
@@ -529,7 +779,7 @@ class MyTTSMainWindow(QMainWindow):
         # Refresh Button
         btn_refresh = QPushButton("🔄 Refresh Voices")
         btn_refresh.setToolTip("Reload voice list from folder")
-        btn_refresh.clicked.connect(self.refresh_voice_list)
+        btn_refresh.clicked.connect(self.on_refresh_voices)
         layout.addWidget(btn_refresh)
 
         # Finalize Scroll
@@ -541,6 +791,17 @@ class MyTTSMainWindow(QMainWindow):
         self.diffusion_slider = QSlider()
         self.scale_slider = QDoubleSpinBox()
 
+    def _update_device_label(self):
+        """Reflects the engine's device (it may fall back to CPU once the model loads)."""
+        if self.tts_wrapper and self.tts_wrapper.device == 'cuda':
+            self.lbl_device.setText("GPU (CUDA) 🚀")
+            self.lbl_device.setToolTip("You are using CUDA")
+            self.lbl_device.setStyleSheet("color: #98c379; font-weight: bold; border: none;") 
+        else:
+            self.lbl_device.setText("CPU (Slow) 🐢")
+            self.lbl_device.setToolTip("You are using CPU")
+            self.lbl_device.setStyleSheet("color: #e5c07b; font-weight: bold; border: none;")
+
     def _toggle_blend_ui(self, checked):
         """Shows/Hides the secondary voice dropdown."""
         self.lbl_voice_2.setVisible(checked)
@@ -641,6 +902,10 @@ class MyTTSMainWindow(QMainWindow):
         
         self.history_tree.setAlternatingRowColors(True)
         self.history_tree.setRootIsDecorated(True)
+
+        self.history_actions = HistoryActionsDelegate(self.history_tree)
+        self.history_actions.action_clicked.connect(self.on_history_action, Qt.ConnectionType.QueuedConnection)
+        self.history_tree.setItemDelegateForColumn(3, self.history_actions)
         
         btn_clear_hist = QPushButton("🗑️ Clear History")
         btn_clear_hist.clicked.connect(self.clear_history)
@@ -861,10 +1126,9 @@ class MyTTSMainWindow(QMainWindow):
             self.book_table.setUpdatesEnabled(False)
             av_voices = self.list_available_voices()
             
-            for entry in data:
-                row = self.book_table.rowCount()
-                self.book_table.insertRow(row)
-                
+            # Size the table once and fill by index (one rowsInserted instead of one per row)
+            self.book_table.setRowCount(len(data))
+            for row, entry in enumerate(data):
                 # Text Anchor
                 item_text = QTableWidgetItem(entry.get("text", ""))
                 self.book_table.setItem(row, 0, item_text)
@@ -898,36 +1162,22 @@ class MyTTSMainWindow(QMainWindow):
                 lay.addWidget(btn_del)
                 self.book_table.setCellWidget(row, 3, wid)
                 
-            self.book_table.setUpdatesEnabled(True)
             self.tabs.setCurrentIndex(1)
             self.statusBar().showMessage(f"Project loaded: {len(data)} lines.", 3000)
             
         except Exception as e:
             error_handler.show_error(self,"UI Population Error: {e}")
+        finally:
+            self.book_table.setUpdatesEnabled(True)
 
     def load_text_to_table(self, path):
-        """Starts background thread to load file."""
+        """Loads the file in the background."""
         # 1. Show Loading State
         self.statusBar().showMessage(f"Loading {os.path.basename(path)}... please wait.")
         self.book_table.setEnabled(False) # Lock table while loading
         
-        # 2. Setup Thread
-        self.loader_thread = QThread()
-        self.loader_worker = FileLoaderWorker(path)
-        self.loader_worker.moveToThread(self.loader_thread)
-        
-        # 3. Connect Signals
-        self.loader_thread.started.connect(self.loader_worker.run)
-        self.loader_worker.finished.connect(self.on_file_load_success)
-        self.loader_worker.error.connect(self.on_file_load_error)
-        
-        # Cleanup when done
-        self.loader_worker.finished.connect(self.loader_thread.quit)
-        self.loader_worker.finished.connect(self.loader_worker.deleteLater)
-        self.loader_thread.finished.connect(self.loader_thread.deleteLater)
-        
-        # 4. Start
-        self.loader_thread.start()
+        # 2. Start on a pooled thread (signals are connected once in __init__)
+        QThreadPool.globalInstance().start(FileLoaderWorker(path, self._file_loader_signals))
 
     @Slot(list)
     def on_file_load_success(self, lines):
@@ -940,10 +1190,9 @@ class MyTTSMainWindow(QMainWindow):
             def_v1 = self.voice_combo_1.currentText()
             
             # --- Optimization: Batch Insert ---
-            for line in lines:
-                row = self.book_table.rowCount()
-                self.book_table.insertRow(row)
-                
+            # Size the table once and fill by index (one rowsInserted instead of one per row)
+            self.book_table.setRowCount(len(lines))
+            for row, line in enumerate(lines):
                 # Text Anchor
                 item_text = QTableWidgetItem(line)
                 item_text.setToolTip(line[:100]) # Tooltip
@@ -1082,110 +1331,88 @@ class MyTTSMainWindow(QMainWindow):
         self.history_tree.clear()
         
         # Iterate backwards (newest first)
-        for idx, gen in enumerate(reversed(self.synthesis_results)):
-            real_idx = len(self.synthesis_results) - 1 - idx
-            
-            combined_path = gen.get("combined", "")
-            chunks = gen.get("chunks", [])
-            source_type = "Book" if gen.get("text_source") == "segmented" else "Quick"
-            timestamp = time.strftime('%H:%M:%S', time.localtime(gen.get("timestamp", 0)))
-            
-            # Title logic
-            if source_type == "Book":
-                title = f"📖 Audiobook Gen #{real_idx+1} ({len(chunks)} segments)"
-            else:
-                first_text = chunks[0].get("graphemes", "") if chunks else "No Text"
-                title = f"📝 {first_text[:40]}..."
-
-            top_item = QTreeWidgetItem([title, source_type, timestamp, ""])
-            self.history_tree.addTopLevelItem(top_item)
-            top_item.setExpanded(False)
-
-            # --- 1. Actions for Top Item (Combined) ---
-            wid = QWidget()
-            hlay = QHBoxLayout(wid)
-            hlay.setContentsMargins(2, 2, 2, 2)
-            hlay.setSpacing(5)
-            
-            # Play Button (Smart)
-            btn_play = QPushButton("▶")
-            btn_play.setFixedWidth(30)
-            if combined_path and os.path.exists(combined_path):
-                btn_play.setToolTip(f"Play: {os.path.basename(combined_path)}")
-                btn_play.clicked.connect(partial(self.play_audio_file, combined_path))
-                btn_play.setStyleSheet("color: #98c379; font-weight: bold;") 
-            else:
-                btn_play.setEnabled(False) 
-                btn_play.setToolTip("File missing or deleted")
-                btn_play.setStyleSheet("color: #5c6370;")
-
-            # Save Button (Smart)
-            btn_save = QPushButton("💾")
-            btn_save.setFixedWidth(30)
-            if combined_path and os.path.exists(combined_path):
-                btn_save.clicked.connect(partial(self.save_audio_dialog, f"gen_{real_idx}_full", combined_path))
-            else:
-                btn_save.setEnabled(False)
-
-            # Delete Button (Винаги активен, за да триеш записа от историята)
-            btn_del = QPushButton("❌")
-            btn_del.setFixedWidth(30)
-            btn_del.setToolTip("Delete History Entry")
-            btn_del.clicked.connect(partial(self.delete_history_item, real_idx))
+        items = [self._build_history_item(gen, real_idx)
+                 for real_idx, gen in reversed(list(enumerate(self.synthesis_results)))]
+        self.history_tree.addTopLevelItems(items)
+        self._rendered_gen_count = len(self.synthesis_results)
+
+    def _append_history_entry(self, gen, real_idx):
+        """Adds a single new (just written) generation at the top of the history tree."""
+        self.history_tree.insertTopLevelItem(0, self._build_history_item(gen, real_idx, check_chunks=False))
+        self._rendered_gen_count += 1
+
+    def _build_history_item(self, gen, real_idx, check_chunks=True) -> QTreeWidgetItem:
+        """
+        Builds the tree item (with segment children) for one generation.
+        `check_chunks=False` skips the per-segment stat for chunks just written;
+        the combined file is always checked, since its (e.g. MP3) export can fail.
+        """
+        combined_path = gen.get("combined", "")
+        chunks = gen.get("chunks", [])
+        source_type = "Book" if gen.get("text_source") == "segmented" else "Quick"
+        timestamp = time.strftime('%H:%M:%S', time.localtime(gen.get("timestamp", 0)))
+        
+        # Title logic
+        if source_type == "Book":
+            title = f"📖 Audiobook Gen #{real_idx+1} ({len(chunks)} segments)"
+        else:
+            first_text = chunks[0].get("graphemes", "") if chunks else "No Text"
+            title = f"📝 {first_text[:40]}..."
+
+        top_item = QTreeWidgetItem([title, source_type, timestamp, ""])
+
+        # --- 1. Actions for Top Item (Combined) ---
+        combined_ok = bool(combined_path) and os.path.exists(combined_path)
+        top_item.setData(3, Qt.ItemDataRole.UserRole, [
+            ("play", combined_path if combined_ok else None,
+             f"Play: {os.path.basename(combined_path)}" if combined_ok else "File missing or deleted"),
+            ("save", (f"gen_{real_idx}_full", combined_path) if combined_ok else None, "Save audio"),
+            # Delete is always enabled so the entry can be removed from history
+            ("delete", real_idx, "Delete History Entry"),
+        ])
+
+        # --- 2. Add Children (Chunks) ---
+        for i, chunk in enumerate(chunks):
+            chunk_text = chunk.get("graphemes", "???")
+            chunk_path = chunk.get("filepath", "")
             
-            hlay.addWidget(btn_play)
-            hlay.addWidget(btn_save)
-            hlay.addWidget(btn_del)
-            self.history_tree.setItemWidget(top_item, 3, wid)
-
-            # --- 2. Add Children (Chunks) ---
-            for i, chunk in enumerate(chunks):
-                chunk_text = chunk.get("graphemes", "???")
-                chunk_path = chunk.get("filepath", "")
-                
-                child_item = QTreeWidgetItem([f"   🗣️ {chunk_text[:60]}...", "Segment", f"#{i+1}", ""])
-                top_item.addChild(child_item)
-                
-                wid_c = QWidget()
-                hlay_c = QHBoxLayout(wid_c)
-                hlay_c.setContentsMargins(2, 2, 2, 2)
-                hlay_c.setSpacing(5)
-                
-                # Chunk Play (Smart)
-                btn_play_c = QPushButton("▶")
-                btn_play_c.setFixedWidth(30)
-                if chunk_path and os.path.exists(chunk_path):
-                    btn_play_c.setToolTip("Play segment")
-                    btn_play_c.clicked.connect(partial(self.play_audio_file, chunk_path))
-                else:
-                    btn_play_c.setEnabled(False)
-                    btn_play_c.setToolTip("File cleaned up (Temp)")
-                    btn_play_c.setStyleSheet("color: #5c6370;")
-
-                # Copy Text (Винаги активно!)
-                btn_copy_c = QPushButton("📋")
-                btn_copy_c.setFixedWidth(30)
-                btn_copy_c.setToolTip("Copy text to clipboard")
-                btn_copy_c.clicked.connect(lambda _, t=chunk_text: QApplication.clipboard().setText(t))
-                
-                # Chunk Save (Smart)
-                btn_save_c = QPushButton("💾")
-                btn_save_c.setFixedWidth(30)
-                if chunk_path and os.path.exists(chunk_path):
-                    btn_save_c.clicked.connect(partial(self.save_audio_dialog, f"gen_{real_idx}_seg_{i}", chunk_path))
-                else:
-                    btn_save_c.setEnabled(False)
-
-                hlay_c.addWidget(btn_play_c)
-                hlay_c.addWidget(btn_copy_c)
-                hlay_c.addWidget(btn_save_c)
-                self.history_tree.setItemWidget(child_item, 3, wid_c)
+            child_item = QTreeWidgetItem([f"   🗣️ {chunk_text[:60]}...", "Segment", f"#{i+1}", ""])
+            chunk_ok = bool(chunk_path) and (not check_chunks or os.path.exists(chunk_path))
+            child_item.setData(3, Qt.ItemDataRole.UserRole, [
+                ("play", chunk_path if chunk_ok else None,
+                 "Play segment" if chunk_ok else "File cleaned up (Temp)"),
+                ("copy", chunk_text, "Copy text to clipboard"),
+                ("save", (f"gen_{real_idx}_seg_{i}", chunk_path) if chunk_ok else None, "Save audio"),
+            ])
+            top_item.addChild(child_item)
+
+        return top_item
+
+    @Slot(str, object)
+    def on_history_action(self, action, payload):
+        """Dispatches a click on one of the history action buttons."""
+        if action == "play":
+            self.play_audio_file(payload)
+        elif action == "save":
+            self.save_audio_dialog(*payload)
+        elif action == "delete":
+            self.delete_history_item(payload)
+        elif action == "copy":
+            QApplication.clipboard().setText(payload)
 
     def clear_history(self):
         self.synthesis_results.clear()
-        persistence.save_generations(PERSIST_FILE, [])
+        self._schedule_history_save()
         self.populate_history_table()
 
+    def _schedule_history_save(self):
+        """Rewrites the history file once edits have settled (see HISTORY_SAVE_DELAY_MS)."""
+        self._save_timer.start()
+
+    def _flush_history_save(self):
+        self._save_timer.stop()
+        persistence.save_generations(PERSIST_FILE, self.synthesis_results)
+
     def delete_history_item(self, original_index):
         """Deletes an entire generation (Combined + Chunks) from disk and history."""
         
@@ -1209,14 +1436,16 @@ class MyTTSMainWindow(QMainWindow):
 
             if item.get("combined"):
                 persistence.delete_file(item["combined"])
+                persistence.delete_file(item["combined"] + PEAKS_SUFFIX)
 
             for chunk in item.get("chunks", []):
                 chunk_path = chunk.get("filepath")
                 if chunk_path:
                     persistence.delete_file(chunk_path)
+                    persistence.delete_file(chunk_path + PEAKS_SUFFIX)
 
             del self.synthesis_results[original_index]
-            persistence.save_generations(PERSIST_FILE, self.synthesis_results)
+            self._schedule_history_save()
             
             self.populate_history_table()
             self.statusBar().showMessage("Entry deleted.", 2000)
@@ -1235,12 +1464,19 @@ class MyTTSMainWindow(QMainWindow):
         
         if reply == QMessageBox.StandardButton.Yes:
             self.stop_audio() # Освобождаваме файловете
+            if self.media_player:
+                self.media_player.setSource(QUrl())
             
-            # Извикваме функцията от persistence (която преместихме там)
-            # Задаваме 0 дни retention, за да изтрие ВСИЧКО
-            persistence.cleanup_temp_files(os.path.join(OUTPUTS_DIR, TEMP_DIR), retention_days=0)
-            
-            self.statusBar().showMessage("Temporary files cleared.", 3000)
+            # Изтриването върви в QThreadPool, за да не блокира GUI-то
+            self.statusBar().showMessage("Clearing temporary files...")
+            QThreadPool.globalInstance().start(
+                _TempCleanupTask(os.path.join(OUTPUTS_DIR, TEMP_DIR), self._cleanup_signals))
+
+    @Slot(int)
+    def on_temp_files_cleared(self, deleted_count):
+        # Segment play/save buttons depend on the files still existing
+        self.populate_history_table()
+        self.statusBar().showMessage(f"Temporary files cleared ({deleted_count} removed).", 3000)
 
     # --- Media Player ---
     def on_play_pause(self):
@@ -1260,9 +1496,11 @@ class MyTTSMainWindow(QMainWindow):
         self.btn_play.setText("▶")
         self.waveform_widget.set_playback_progress(0)
 
-    def play_audio_file(self, filepath):
+    def play_audio_file(self, filepath, verify=True):
+        """Plays a file; `verify=False` skips the exists check for files just written."""
         self.stop_audio()
-        if not os.path.exists(filepath): 
+        self._pending_seek_ms = 0 # A resume position only applies to the combined file it was set for
+        if verify and not os.path.exists(filepath): 
             return
         
         # Защита, ако плеърът не е инициализиран
@@ -1272,27 +1510,36 @@ class MyTTSMainWindow(QMainWindow):
         self.current_filepath = filepath
         self.media_player.setSource(QUrl.fromLocalFile(filepath))
         
-        # [FIX] Викаме метода през работника, за да не дублираме код
-        if self.synthesis_worker:
-            wf = self.synthesis_worker._load_waveform_data(filepath) 
-            self.waveform_widget.set_waveform(wf)
+        self.waveform_widget.set_file(filepath)
         
         self.media_player.play()
         self.btn_play.setText("⏸")
 
-    @Slot(str, np.ndarray)
-    def on_file_ready_for_playback(self, filepath, waveform):
+    @Slot(str)
+    def on_first_chunk_ready(self, filepath):
+        """Starts playing the first chunk while the rest is still being synthesized."""
+        self.play_audio_file(filepath, verify=False)
+        self._stream_preview_path = filepath
+
+    @Slot(str, object)
+    def on_file_ready_for_playback(self, filepath, peaks):
         # [FIX] Защита, ако плеърът не е инициализиран
         if not self.media_player: 
             return
 
+        # The first chunk is the start of the combined file: continue from where the preview is
+        if self._stream_preview_path and self.current_filepath == self._stream_preview_path:
+            if self.media_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
+                self._pending_seek_ms = self.media_player.position()
+            elif self.media_player.mediaStatus() == QMediaPlayer.MediaStatus.EndOfMedia:
+                self._pending_seek_ms = self.stored_duration
+        self._stream_preview_path = None
+
         self.current_filepath = filepath
         self.media_player.setSource(QUrl.fromLocalFile(filepath))
         
-        # Тук виждам, че се опитваш да ползваш self._load_waveform_data
-        # Но този метод май липсва в класа (виж стъпка 3 долу)
         if hasattr(self, 'waveform_widget'):
-             self.waveform_widget.set_waveform(waveform)
+             self.waveform_widget.set_peaks(peaks, filepath)
              
         self.media_player.play()
         self.btn_play.setText("⏸")
@@ -1306,19 +1553,21 @@ class MyTTSMainWindow(QMainWindow):
     @Slot(int)
     def on_player_position_changed(self, pos):
         if self.stored_duration > 0:
+            # Redraw at most every POSITION_UPDATE_MS (always show the end position)
+            if abs(pos - self._last_pos_update_ms) < POSITION_UPDATE_MS and pos != self.stored_duration:
+                return
+            self._last_pos_update_ms = pos
+
             self.waveform_widget.set_playback_progress(pos / self.stored_duration)
             
             # --- SMART TIME FORMATTING ---
             ch, cm, cs = self._format_time(pos)
-            th, tm, ts = self._format_time(self.stored_duration)
-            if th > 0:
+            if self._total_time_has_hours:
                 cur_str = f"{ch}:{cm:02}:{cs:02}"
-                tot_str = f"{th}:{tm:02}:{ts:02}"
             else:
                 cur_str = f"{cm:02}:{cs:02}"
-                tot_str = f"{tm:02}:{ts:02}"
                 
-            self.lbl_time.setText(f"{cur_str} / {tot_str}")
+            self.lbl_time.setText(f"{cur_str} / {self._total_time_str}")
 
     @Slot(int)
     def on_player_duration_changed(self, dur):
@@ -1326,6 +1575,20 @@ class MyTTSMainWindow(QMainWindow):
             self.stored_duration = dur
             self.waveform_widget.set_audio_duration(dur)
 
+            # The total only changes with the source, so format it once here
+            th, tm, ts = self._format_time(dur)
+            self._total_time_has_hours = th > 0
+            self._total_time_str = f"{th}:{tm:02}:{ts:02}" if th > 0 else f"{tm:02}:{ts:02}"
+
+    @Slot(object)
+    def on_player_media_status_changed(self, status):
+        # setPosition() is only honoured once the new source has loaded
+        if self._pending_seek_ms and status in (QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia):
+            self.media_player.setPosition(self._pending_seek_ms)
+            self._pending_seek_ms = 0
+        elif status == QMediaPlayer.MediaStatus.InvalidMedia:
+            self._pending_seek_ms = 0
+
     @Slot(object)
     def on_player_state_changed(self, state):
         if state == QMediaPlayer.PlaybackState.StoppedState:
@@ -1333,6 +1596,13 @@ class MyTTSMainWindow(QMainWindow):
             self.waveform_widget.set_playback_progress(0)
 
     # --- Helpers ---
+    def on_refresh_voices(self):
+        """Rescans the voices directory (the list is otherwise cached in models)."""
+        models.invalidate_voice_list()
+        models.clear_voice_cache()
+        self.refresh_voice_list()
+        self.statusBar().showMessage(f"Voices refreshed ({self.voice_combo_1.count()} found).", 3000)
+
     def refresh_voice_list(self):
         """Populates voice combos and restores selection from Config."""
         voices = models.list_available_voices()
@@ -1394,6 +1664,7 @@ class MyTTSMainWindow(QMainWindow):
     def on_synthesis_finished(self, result):
         self.setWindowTitle("Kokoro Studio v2.0.1")
         self.statusBar().showMessage("Ready.")
+        self._update_device_label()
         if result:
             chunks_raw, combined = result
             if combined:
@@ -1407,19 +1678,27 @@ class MyTTSMainWindow(QMainWindow):
                         "filepath": c[3] # Skip c[2] (numpy)
                     })
                 
-                self.synthesis_results.append({
+                gen = {
                     "timestamp": time.time(),
                     "combined": combined,
                     "text_source": "segmented" if self.tabs.currentIndex() == 1 else "scratch",
                     "chunks": clean_chunks
-                })
-                persistence.save_generations(PERSIST_FILE, self.synthesis_results)
-                self.populate_history_table()
+                }
+                self.synthesis_results.append(gen)
+                # A pending full rewrite will include this entry anyway
+                if not self._save_timer.isActive():
+                    persistence.append_generation(PERSIST_FILE, gen)
+                if self._rendered_gen_count == len(self.synthesis_results) - 1:
+                    self._append_history_entry(gen, len(self.synthesis_results) - 1)
+                else:
+                    self.populate_history_table()
                 
         self._reset_render_button()
 
     def on_synthesis_error(self, msg):
+        self._stream_preview_path = None
         self.statusBar().showMessage(f"Error: {msg}")
+        self._update_device_label()
         error_handler.show_error(self, msg)
         self._reset_render_button()
         
@@ -1450,10 +1729,7 @@ class MyTTSMainWindow(QMainWindow):
 
 
     def _load_config(self, path):
-        if os.path.exists(path):
-            with open(path, 'r', encoding='utf-8') as f: 
-                return yaml.safe_load(f)
-        return {}
+        return load_config(path)
 
     def _apply_stylesheet(self):
         self.setStyleSheet("""
@@ -1527,7 +1803,11 @@ class MyTTSMainWindow(QMainWindow):
         except Exception as e:
             logger.error(f"Failed to save config: {e}")
 
-        # 4. Stops the Audio Player
+        # 4. Flush a pending history rewrite
+        if self._save_timer.isActive():
+            self._flush_history_save()
+
+        # 5. Stops the Audio Player
         if self.media_player:
             self.media_player.stop()
             self.media_player.setSource(QUrl())